@@ -0,0 +1,155 @@
+import argparse
+import orjson
+import os
+import sys
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tqdm import tqdm
+
+from xml2json import iter_records, get_cpu_info, usable_cpu_count, walk_files
+from segregate import is_management_paper
+from selective import extract_paper_metadata
+
+# The stage modules' basicConfig calls run on import with lazily opened
+# file handlers; replace them so the fused pipeline logs to one file only
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('pipeline.log'),
+        logging.StreamHandler()
+    ],
+    force=True
+)
+
+def process_file(args):
+    """Convert, filter and extract one XML file in a single pass"""
+    input_file, output_dir = args
+    start_time = time.time()
+
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Same name the three-stage run produced (sample.xml.gz -> sample_management.json)
+        xml_name = os.path.basename(input_file)
+        if xml_name.endswith('.gz'):
+            xml_name = xml_name[:-3]
+        output_path = os.path.join(
+            output_dir, xml_name.replace('.xml', '_management.json')
+        )
+
+        # Records never leave memory between stages
+        total_records = 0
+        papers = []
+        for record in iter_records(input_file):
+            total_records += 1
+            if is_management_paper(record):
+                papers.append(extract_paper_metadata(record))
+
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(papers, option=orjson.OPT_INDENT_2))
+
+        return {
+            'file': input_file,
+            'records': total_records,
+            'papers': len(papers),
+            'time': time.time() - start_time,
+            'success': True
+        }
+
+    except Exception as e:
+        logging.error(f"Error processing {input_file}: {str(e)}")
+        return {
+            'file': input_file,
+            'records': 0,
+            'papers': 0,
+            'time': time.time() - start_time,
+            'success': False,
+            'error': str(e)
+        }
+
+def run_pipeline(input_dir, output_dir, max_workers=None):
+    """Extract management paper metadata from all XML files in input directory
+
+    Returns False when no input files were found, True otherwise.
+    """
+    xml_files = list(walk_files(input_dir, ('.xml', '.xml.gz')))
+
+    if not xml_files:
+        logging.error(f"No XML files found in {input_dir}")
+        return False
+
+    cpu_info = get_cpu_info()
+    logging.info("\nSystem Resources:")
+    logging.info(f"Cores: {cpu_info['total_cores']} Physical: {cpu_info['physical_cores']}")
+    logging.info(f"Memory Available: {cpu_info['available_memory']}")
+    logging.info(f"\nFound {len(xml_files)} XML files to process")
+
+    total_records = 0
+    total_papers = 0
+    failed_files = []
+
+    # Size the pool from the CPUs this process may run on (cpu_count()
+    # reports host cores)
+    workers = max_workers or usable_cpu_count()
+
+    # Start the largest files first so they don't straggle at the end
+    xml_files.sort(key=os.path.getsize, reverse=True)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        args_list = [(f, output_dir) for f in xml_files]
+
+        last_refresh = 0.0
+        with tqdm(total=len(xml_files), desc="Processing files") as pbar:
+            futures = [executor.submit(process_file, args) for args in args_list]
+            for future in as_completed(futures):
+                result = future.result()
+                pbar.update(1)
+                if result['success']:
+                    total_records += result['records']
+                    total_papers += result['papers']
+                    # Refresh the resource readout at most every 2 seconds
+                    if time.time() - last_refresh > 2:
+                        last_refresh = time.time()
+                        current_cpu = get_cpu_info()
+                        pbar.set_postfix({
+                            'records': total_records,
+                            'papers': total_papers,
+                            'current_file': os.path.basename(result['file']),
+                            'cpu%': f"{current_cpu['avg_cpu_usage']:.1f}",
+                            'mem': current_cpu['available_memory']
+                        })
+                else:
+                    failed_files.append(result['file'])
+
+    # Final report
+    logging.info(f"\nProcessing Complete:")
+    logging.info(f"Files Processed: {len(xml_files)}")
+    logging.info(f"Successful: {len(xml_files)-len(failed_files)} Failed: {len(failed_files)}")
+    logging.info(f"Total Records Scanned: {total_records}")
+    logging.info(f"Total Management Papers Found: {total_papers}")
+
+    if failed_files:
+        logging.error("Failed files:")
+        for f in failed_files:
+            logging.error(f"- {f}")
+
+    return True
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Extract management paper metadata from WoS XML/XML.GZ files"
+    )
+    parser.add_argument('--input', required=True,
+                        help="Directory searched recursively for .xml/.xml.gz files")
+    parser.add_argument('--output', default='management_full_papers_selected_attributes',
+                        help="Directory for the <name>_management.json outputs")
+    args = parser.parse_args()
+
+    if not run_pipeline(
+        args.input,
+        args.output,
+        max_workers=usable_cpu_count()
+    ):
+        sys.exit(1)
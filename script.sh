@@ -27,52 +27,43 @@ source "$VENV_NAME/bin/activate"
 echo "======= Installing dependencies ======="
 pip install -r "$REQUIREMENTS" > "$LOG_DIR/install.log" 2>&1
 
+# Compile the per-paper metadata extractor with Cython (falls back to the
+# pure Python module if the build fails). The build runs in a scratch
+# directory and only the extension it produced is removed on exit, so
+# later edits to selective.py are never shadowed by a stale build
+echo "======= Compiling selective.py (see $LOG_DIR/cythonize.log) ======="
+CYTHON_BUILD_DIR="$(mktemp -d)"
+CYTHON_EXT=""
+trap 'rm -rf "$CYTHON_BUILD_DIR"; rm -f ${CYTHON_EXT:+"$CYTHON_EXT"}' EXIT
+cp selective.py "$CYTHON_BUILD_DIR/"
+if (cd "$CYTHON_BUILD_DIR" && cythonize -3 -i selective.py) > "$LOG_DIR/cythonize.log" 2>&1; then
+    for ext in "$CYTHON_BUILD_DIR"/selective.*.so; do
+        CYTHON_EXT="$(basename "$ext")"
+        cp "$ext" "$CYTHON_EXT"
+    done
+else
+    echo "Cython build failed, using pure Python selective.py"
+fi
+
 # Create output directory structure
 mkdir -p "$OUTPUT_BASE"
 
 # Pipeline execution
 echo "======= Starting processing pipeline ======="
 
-# Step 1: XML to JSON conversion
-echo "======= Step1 - xml2json.py running (see $LOG_DIR/xml2json.log) ======="
-python xml2json.py \
+# Single pass: XML parsing, management filter and attribute selection
+# (xml2json.py, segregate.py and selective.py remain usable as separate steps)
+echo "======= pipeline.py running (see $LOG_DIR/pipeline.log) ======="
+python pipeline.py \
     --input "$INPUT_DIR" \
-    --output "$OUTPUT_BASE/json_output" \
-    > "$LOG_DIR/xml2json.log" 2>&1
-
-if [ $? -ne 0 ]; then
-    echo "Error in Step1! Check $LOG_DIR/xml2json.log"
-    exit 1
-fi
-echo "==== Step1 completed - json_output created ===="
-echo
-
-# Step 2: Paper segregation
-echo "======= Step2 - segregate.py running (see $LOG_DIR/segregate.log) ======="
-python segregate.py \
-    --input "$OUTPUT_BASE/json_output" \
-    --output "$OUTPUT_BASE/management_full_papers" \
-    > "$LOG_DIR/segregate.log" 2>&1
-
-if [ $? -ne 0 ]; then
-    echo "Error in Step2! Check $LOG_DIR/segregate.log"
-    exit 1
-fi
-echo "==== Step2 completed - management_full_papers created ===="
-echo
-
-# Step 3: Attribute selection
-echo "======= Step3 - selective.py running (see $LOG_DIR/selective.log) ======="
-python selective.py \
-    --input "$OUTPUT_BASE/management_full_papers" \
     --output "$OUTPUT_BASE/management_full_papers_selected_attributes" \
-    > "$LOG_DIR/selective.log" 2>&1
+    > "$LOG_DIR/pipeline.log" 2>&1
 
 if [ $? -ne 0 ]; then
-    echo "Error in Step3! Check $LOG_DIR/selective.log"
+    echo "Error in pipeline! Check $LOG_DIR/pipeline.log"
     exit 1
 fi
-echo "==== Step3 completed - management_full_papers_selected_attributes created ===="
+echo "==== Pipeline completed - management_full_papers_selected_attributes created ===="
 echo
 
 # Cleanup
@@ -1,9 +1,10 @@
-import json
+import orjson
 import re
 import os
+import mmap
 import logging
 import time
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from tqdm import tqdm
 import psutil
 from pathlib import Path
@@ -13,7 +14,7 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('management_filter.log'),
+        logging.FileHandler('management_filter.log', delay=True),
         logging.StreamHandler()
     ]
 )
@@ -28,7 +29,19 @@ target_journals = {
     r"\bAdministrative\s*Science\s*Quarterly\b",
     r"\bJournal\s*of\s*Management\b"
 }
-patterns = [re.compile(journal, re.IGNORECASE) for journal in target_journals]
+# One case-insensitive alternation so each title is scanned once. Titles
+# used to be matched with all whitespace removed, which made \b only hold
+# next to punctuation or the ends of the title; the outer guards keep that
+# (e.g. "International Journal of Management Reviews" is still rejected)
+journal_pattern = re.compile(
+    r"(?:^|[^\w\s])\s*(?:" + "|".join(sorted(target_journals)) + r")\s*(?:[^\w\s]|$)",
+    re.IGNORECASE
+)
+# Bound once so the per-title check skips the attribute lookup
+_search_journal = journal_pattern.search
+# Every target journal name contains one of these words; titles without
+# any of them are rejected with plain substring checks before the regex
+_KEYWORDS = ('management', 'organization', 'strategy', 'administrative')
 
 def is_management_paper(record):
     """Filter function remains unchanged from original"""
@@ -36,16 +49,25 @@ def is_management_paper(record):
         titles = record['static_data']['summary']['titles']['title']
         for title in titles:
             if title.get('@type') == 'source' and title.get('_text'):
-                text = re.sub(r'\s+', '', title['_text'].lower())
-                if any(pattern.search(text) for pattern in patterns):
+                text = title['_text']
+                lowered = text.lower()
+                if not any(k in lowered for k in _KEYWORDS):
+                    continue
+                if _search_journal(text):
                     return True
     except KeyError:
         pass
     return False
 
+def usable_cpu_count():
+    """Number of CPUs this process may run on (host core count where unknown)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count()
+
 def get_cpu_info():
     """Reuse CPU monitoring from XML processor"""
-    cpu = psutil.cpu_percent(interval=1, percpu=True)
+    cpu = psutil.cpu_percent(interval=None, percpu=True)
     return {
         'total_cores': psutil.cpu_count(),
         'physical_cores': psutil.cpu_count(logical=False),
@@ -54,6 +76,9 @@ def get_cpu_info():
         'available_memory': f"{psutil.virtual_memory().available/(1024**3):.2f}GB"
     }
 
+# Non-blocking readings are relative to the previous call; take a baseline
+psutil.cpu_percent(interval=None, percpu=True)
+
 def process_json_file(args):
     """Process individual JSON files with error handling"""
     json_path, input_dir, output_dir = args
@@ -68,17 +93,20 @@ def process_json_file(args):
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Load and process data
-        with open(json_path, 'r') as f:
-            data = json.load(f)
+        # Parse straight from the page cache instead of a read() copy
+        with open(json_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                memoryview(mm) as view:
+            data = orjson.loads(view)
         
         management_papers = [p for p in data['records'] if is_management_paper(p)]
         
-        # Save filtered results
-        with open(output_path, 'w') as f:
-            json.dump({
+        # Save filtered results (compact; only read back by selective.py)
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps({
                 "count": len(management_papers),
                 "papers": management_papers
-            }, f, indent=2)
+            }))
         
         return {
             'file': str(json_path),
@@ -97,9 +125,25 @@ def process_json_file(args):
             'error': str(e)
         }
 
+def walk_files(root, suffixes):
+    """Recursively yield paths of files under root ending in one of suffixes"""
+    # An empty root means the current directory, as with Path('').rglob();
+    # a missing or unreadable root raises so a mistyped input is reported
+    with os.scandir(root or '.') as entries:
+        for entry in entries:
+            path = os.path.join(root, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                # Unreadable subdirectories are skipped, as rglob() does
+                try:
+                    yield from walk_files(path, suffixes)
+                except OSError:
+                    continue
+            elif entry.name.endswith(suffixes):
+                yield path
+
 def filter_management_papers(input_dir, output_dir, max_workers=None):
     """Main processing function with system monitoring"""
-    json_files = list(Path(input_dir).rglob('*.json'))
+    json_files = list(walk_files(input_dir, ('.json',)))
     if not json_files:
         logging.error(f"No JSON files found in {input_dir}")
         return
@@ -116,22 +160,35 @@ def filter_management_papers(input_dir, output_dir, max_workers=None):
     total_papers = 0
     success_count = 0
     
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        args_list = [(str(f), input_dir, output_dir) for f in json_files]
+    # Size the pool from the CPUs this process may run on (cpu_count()
+    # reports host cores)
+    workers = max_workers or usable_cpu_count()
+    
+    # Start the largest files first so they don't straggle at the end
+    json_files.sort(key=os.path.getsize, reverse=True)
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        args_list = [(f, input_dir, output_dir) for f in json_files]
         
+        last_refresh = 0.0
         with tqdm(total=len(json_files), desc="Filtering papers") as pbar:
-            for result in executor.map(process_json_file, args_list):
+            futures = [executor.submit(process_json_file, args) for args in args_list]
+            for future in as_completed(futures):
+                result = future.result()
                 pbar.update(1)
                 if result['success']:
                     success_count += 1
                     total_papers += result['count']
-                    current_cpu = get_cpu_info()
-                    pbar.set_postfix({
-                        'total': total_papers,
-                        'current_file': Path(result['file']).name,
-                        'cpu%': f"{current_cpu['avg_cpu_usage']:.1f}",
-                        'mem': current_cpu['available_memory']
-                    })
+                    # Refresh the resource readout at most every 2 seconds
+                    if time.time() - last_refresh > 2:
+                        last_refresh = time.time()
+                        current_cpu = get_cpu_info()
+                        pbar.set_postfix({
+                            'total': total_papers,
+                            'current_file': Path(result['file']).name,
+                            'cpu%': f"{current_cpu['avg_cpu_usage']:.1f}",
+                            'mem': current_cpu['available_memory']
+                        })
     
     # Final report
     logging.info(f"\nProcessing Complete:")
@@ -146,5 +203,5 @@ if __name__ == '__main__':
     filter_management_papers(
         input_directory,
         output_directory,
-        max_workers=os.cpu_count()
+        max_workers=usable_cpu_count()
     )
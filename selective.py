@@ -1,7 +1,8 @@
-import json
+import orjson
 import logging
 import os
-from concurrent.futures import ProcessPoolExecutor
+import mmap
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from typing import Any, Dict, List
 import time
@@ -13,15 +14,21 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('metadata_processing.log'),
+        logging.FileHandler('metadata_processing.log', delay=True),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger(__name__)
 
+def usable_cpu_count():
+    """Number of CPUs this process may run on (host core count where unknown)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count()
+
 def get_cpu_info():
     """System resource monitoring from previous implementation"""
-    cpu = psutil.cpu_percent(interval=1, percpu=True)
+    cpu = psutil.cpu_percent(interval=None, percpu=True)
     return {
         'total_cores': psutil.cpu_count(),
         'physical_cores': psutil.cpu_count(logical=False),
@@ -30,38 +37,43 @@ def get_cpu_info():
         'available_memory': f"{psutil.virtual_memory().available/(1024**3):.2f}GB"
     }
 
-def safe_get(obj: Dict[str, Any], key: str, default: Any = None) -> Any:
-    """Safely get a value from a dictionary, returning default if key doesn't exist"""
-    try:
-        return obj.get(key, default)
-    except (AttributeError, TypeError):
-        return default
+# Non-blocking readings are relative to the previous call; take a baseline
+psutil.cpu_percent(interval=None, percpu=True)
+
+# Shared read-only fallback for nested lookups; never mutated
+_EMPTY: Dict[str, Any] = {}
+
+def dig(obj: Any, *keys: str, default: Any = '') -> Any:
+    """Follow nested dictionary keys, returning default if any level is missing"""
+    for key in keys:
+        obj = obj.get(key) if isinstance(obj, dict) else None
+        if obj is None:
+            return default
+    return obj
 
 def extract_paper_metadata(paper: Dict[str, Any]) -> Dict[str, Any]:
     """Extract structured metadata from a paper record"""
-    static_data = safe_get(paper, 'static_data', {})
-    dynamic_data = safe_get(paper, 'dynamic_data', {})
+    static_data = dig(paper, 'static_data', default=_EMPTY)
+    dynamic_data = dig(paper, 'dynamic_data', default=_EMPTY)
     
     # Get basic metadata
     metadata = {
-        'wos_uid': safe_get(paper, 'UID', {}).get('_text', ''),
+        'wos_uid': dig(paper, 'UID', '_text'),
         'doi': '',
         'database_edition': ''
     }
     
     # Extract DOI and database edition
-    if 'cluster_related' in dynamic_data:
-        identifiers = safe_get(dynamic_data['cluster_related'], 'identifiers', {}).get('identifier', [])
-        for id_obj in identifiers:
-            if id_obj.get('@type') == 'doi':
-                metadata['doi'] = id_obj.get('@value', '')
+    identifiers = dig(dynamic_data, 'cluster_related', 'identifiers', 'identifier', default=())
+    for id_obj in identifiers:
+        if id_obj.get('@type') == 'doi':
+            metadata['doi'] = id_obj.get('@value', '')
     
-    if 'EWUID' in safe_get(static_data, 'summary', {}):
-        edition = safe_get(static_data['summary']['EWUID'], 'edition', {})
-        if isinstance(edition, dict):
-            metadata['database_edition'] = edition.get('@value', '')
-        elif isinstance(edition, list):
-            metadata['database_edition'] = [ed.get('@value', '') for ed in edition]
+    edition = dig(static_data, 'summary', 'EWUID', 'edition', default=_EMPTY)
+    if isinstance(edition, dict):
+        metadata['database_edition'] = edition.get('@value', '')
+    elif isinstance(edition, list):
+        metadata['database_edition'] = [ed.get('@value', '') for ed in edition]
 
     # Extract content
     content = {
@@ -75,7 +87,7 @@ def extract_paper_metadata(paper: Dict[str, Any]) -> Dict[str, Any]:
     }
     
     # Get title and journal
-    titles = safe_get(static_data, 'summary', {}).get('titles', {}).get('title', [])
+    titles = dig(static_data, 'summary', 'titles', 'title', default=())
     for title in titles:
         if title.get('@type') == 'item':
             content['title'] = title.get('_text', '')
@@ -83,33 +95,41 @@ def extract_paper_metadata(paper: Dict[str, Any]) -> Dict[str, Any]:
             content['journal'] = title.get('_text', '')
     
     # Get abstract
-    abstracts = safe_get(static_data, 'fullrecord_metadata', {}).get('abstracts', {}).get('abstract', {})
-    if abstracts:
-        abstract_text = safe_get(abstracts, 'abstract_text', {}).get('p', [])
-        if isinstance(abstract_text, list):
-            content['abstract'] = ' '.join([p.get('_text', '') for p in abstract_text])
-        elif isinstance(abstract_text, dict):
-            content['abstract'] = abstract_text.get('_text', '')
+    abstract_text = dig(static_data, 'fullrecord_metadata', 'abstracts', 'abstract',
+                        'abstract_text', 'p', default=None)
+    if isinstance(abstract_text, list):
+        content['abstract'] = ' '.join([p.get('_text', '') for p in abstract_text])
+    elif isinstance(abstract_text, dict):
+        content['abstract'] = abstract_text.get('_text', '')
     
     # Get keywords
-    keywords = safe_get(static_data, 'fullrecord_metadata', {}).get('keywords', {}).get('keyword', [])
+    keywords = dig(static_data, 'fullrecord_metadata', 'keywords', 'keyword', default=())
     if keywords:
         content['keywords']['author'] = [kw.get('_text', '') for kw in keywords]
     
-    keywords_plus = safe_get(static_data, 'item', {}).get('keywords_plus', {}).get('keyword', [])
+    keywords_plus = dig(static_data, 'item', 'keywords_plus', 'keyword', default=())
     if keywords_plus:
         content['keywords']['system'] = [kw.get('_text', '') for kw in keywords_plus]
 
     # Extract authors
     authors = []
-    names = safe_get(static_data, 'summary', {}).get('names', {}).get('name', [])
-    addresses = safe_get(static_data, 'fullrecord_metadata', {}).get('addresses', {}).get('address_name', [])
+    names = dig(static_data, 'summary', 'names', 'name', default=())
+    addresses = dig(static_data, 'fullrecord_metadata', 'addresses', 'address_name', default=())
+    if isinstance(addresses, dict):
+        addresses = [addresses]
+    
+    # Index address specs by their number for the per-author lookup
+    addr_by_no = {}
+    for address in addresses:
+        addr_spec = dig(address, 'address_spec', default=_EMPTY)
+        if '@addr_no' in addr_spec:
+            addr_by_no.setdefault(addr_spec['@addr_no'], []).append(addr_spec)
     
     for author in names:
         author_data = {
-            'name': safe_get(author, 'display_name', {}).get('_text', ''),
+            'name': dig(author, 'display_name', '_text'),
             'orcid': author.get('@orcid_id_tr', ''),
-            'email': safe_get(author, 'email_addr', {}).get('_text', ''),
+            'email': dig(author, 'email_addr', '_text'),
             'affiliations': [],
             'ids': []
         }
@@ -117,33 +137,31 @@ def extract_paper_metadata(paper: Dict[str, Any]) -> Dict[str, Any]:
         # Get affiliations
         addr_no = author.get('@addr_no')
         if addr_no:
-            for address in addresses:
-                if safe_get(address, 'address_spec', {}).get('@addr_no') == addr_no:
-                    addr_spec = address['address_spec']
-                    affiliation = {
-                        'institution': '',
-                        'department': '',
-                        'country': safe_get(addr_spec, 'country', {}).get('_text', ''),
-                        'city': safe_get(addr_spec, 'city', {}).get('_text', ''),
-                        'state': safe_get(addr_spec, 'state', {}).get('_text', '')
-                    }
+            for addr_spec in addr_by_no.get(addr_no, []):
+                affiliation = {
+                    'institution': '',
+                    'department': '',
+                    'country': dig(addr_spec, 'country', '_text'),
+                    'city': dig(addr_spec, 'city', '_text'),
+                    'state': dig(addr_spec, 'state', '_text')
+                }
+                
+                # Get institution name
+                orgs = dig(addr_spec, 'organizations', 'organization', default=None)
+                if isinstance(orgs, list):
+                    for org in orgs:
+                        if isinstance(org, dict) and org.get('@pref') == 'Y':
+                            affiliation['institution'] = org.get('_text', '')
+                            break
+                
+                # Get department
+                subunits = dig(addr_spec, 'suborganizations', 'suborganization', default=None)
+                if isinstance(subunits, list) and len(subunits) > 0:
+                    affiliation['department'] = subunits[0].get('_text', '')
+                elif isinstance(subunits, dict):
+                    affiliation['department'] = subunits.get('_text', '')
                     
-                    # Get institution name
-                    orgs = safe_get(addr_spec, 'organizations', {}).get('organization', [])
-                    if isinstance(orgs, list):
-                        for org in orgs:
-                            if isinstance(org, dict) and org.get('@pref') == 'Y':
-                                affiliation['institution'] = org.get('_text', '')
-                                break
-                    
-                    # Get department
-                    subunits = safe_get(addr_spec, 'suborganizations', {}).get('suborganization', [])
-                    if isinstance(subunits, list) and len(subunits) > 0:
-                        affiliation['department'] = subunits[0].get('_text', '')
-                    elif isinstance(subunits, dict):
-                        affiliation['department'] = subunits.get('_text', '')
-                        
-                    author_data['affiliations'].append(affiliation)
+                author_data['affiliations'].append(affiliation)
         
         # Get researcher IDs
         if '@r_id' in author:
@@ -152,30 +170,29 @@ def extract_paper_metadata(paper: Dict[str, Any]) -> Dict[str, Any]:
         authors.append(author_data)
 
     # Extract publication details
-    pub_info = safe_get(static_data, 'summary', {}).get('pub_info', {})
+    pub_info = dig(static_data, 'summary', 'pub_info', default=_EMPTY)
     publication = {
         'year': pub_info.get('@pubyear', ''),
         'volume_issue': f"{pub_info.get('@vol', '')}({pub_info.get('@issue', '')})",
-        'pages': f"{pub_info.get('page', {}).get('@begin', '')}-{pub_info.get('page', {}).get('@end', '')}"
+        'pages': f"{dig(pub_info, 'page', '@begin')}-{dig(pub_info, 'page', '@end')}"
     }
 
     # Extract categories
     categories = []
-    category_info = safe_get(static_data, 'fullrecord_metadata', {}).get('category_info', {})
-    subjects = safe_get(category_info, 'subjects', {}).get('subject', [])
+    subjects = dig(static_data, 'fullrecord_metadata', 'category_info', 'subjects', 'subject', default=None)
     if isinstance(subjects, list):
         categories = [subj.get('_text', '') for subj in subjects if subj.get('@ascatype') == 'traditional']
 
     # Extract references
     references = []
-    refs = safe_get(static_data, 'fullrecord_metadata', {}).get('references', {}).get('reference', [])
+    refs = dig(static_data, 'fullrecord_metadata', 'references', 'reference', default=())
     for ref in refs:
         reference = {
-            'authors': safe_get(ref, 'citedAuthor', {}).get('_text', ''),
-            'title': safe_get(ref, 'citedTitle', {}).get('_text', ''),
-            'year': safe_get(ref, 'year', {}).get('_text', ''),
-            'source': safe_get(ref, 'citedWork', {}).get('_text', ''),
-            'doi': safe_get(ref, 'doi', {}).get('_text', '')
+            'authors': dig(ref, 'citedAuthor', '_text'),
+            'title': dig(ref, 'citedTitle', '_text'),
+            'year': dig(ref, 'year', '_text'),
+            'source': dig(ref, 'citedWork', '_text'),
+            'doi': dig(ref, 'doi', '_text')
         }
         references.append(reference)
 
@@ -199,15 +216,19 @@ def process_single_file(args):
         output_path = Path(output_dir) / relative_path
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Original processing logic
-        logger.info(f"Processing {input_path}")
-        with open(input_path, 'r', encoding='utf-8') as f:
-            raw_data = json.load(f)
+        # Per-file detail stays at DEBUG; the shared log file only gets run-level events
+        logger.debug(f"Processing {input_path}")
+        # Parse straight from the page cache instead of a read() copy
+        with open(input_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                memoryview(mm) as view:
+            raw_data = orjson.loads(view)
         
-        processed_data = [extract_paper_metadata(paper) for paper in safe_get(raw_data, "papers", default=[])]
+        processed_data = [extract_paper_metadata(paper) for paper in dig(raw_data, 'papers', default=())]
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(processed_data, f, indent=2, ensure_ascii=False)
+        # orjson always emits UTF-8, matching the previous ensure_ascii=False
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(processed_data, option=orjson.OPT_INDENT_2))
         
         return {
             'file': str(input_path),
@@ -226,9 +247,25 @@ def process_single_file(args):
             'error': str(e)
         }
 
+def walk_files(root, suffixes):
+    """Recursively yield paths of files under root ending in one of suffixes"""
+    # An empty root means the current directory, as with Path('').rglob();
+    # a missing or unreadable root raises so a mistyped input is reported
+    with os.scandir(root or '.') as entries:
+        for entry in entries:
+            path = os.path.join(root, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                # Unreadable subdirectories are skipped, as rglob() does
+                try:
+                    yield from walk_files(path, suffixes)
+                except OSError:
+                    continue
+            elif entry.name.endswith(suffixes):
+                yield path
+
 def process_json_directory(input_dir: str, output_dir: str, max_workers: int = None):
     """Process all JSON files in directory with parallel execution"""
-    json_files = list(Path(input_dir).rglob('*.json'))
+    json_files = list(walk_files(input_dir, ('.json',)))
     if not json_files:
         logger.error(f"No JSON files found in {input_dir}")
         return
@@ -245,22 +282,35 @@ def process_json_directory(input_dir: str, output_dir: str, max_workers: int = N
     total_processed = 0
     success_count = 0
     
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        args_list = [(str(f), input_dir, output_dir) for f in json_files]
+    # Size the pool from the CPUs this process may run on (cpu_count()
+    # reports host cores)
+    workers = max_workers or usable_cpu_count()
+    
+    # Start the largest files first so they don't straggle at the end
+    json_files.sort(key=os.path.getsize, reverse=True)
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        args_list = [(f, input_dir, output_dir) for f in json_files]
         
+        last_refresh = 0.0
         with tqdm(total=len(json_files), desc="Processing files") as pbar:
-            for result in executor.map(process_single_file, args_list):
+            futures = [executor.submit(process_single_file, args) for args in args_list]
+            for future in as_completed(futures):
+                result = future.result()
                 pbar.update(1)
                 if result['success']:
                     success_count += 1
                     total_processed += result['processed']
-                    current_cpu = get_cpu_info()
-                    pbar.set_postfix({
-                        'total_papers': total_processed,
-                        'current_file': Path(result['file']).name,
-                        'cpu%': f"{current_cpu['avg_cpu_usage']:.1f}",
-                        'mem': current_cpu['available_memory']
-                    })
+                    # Refresh the resource readout at most every 2 seconds
+                    if time.time() - last_refresh > 2:
+                        last_refresh = time.time()
+                        current_cpu = get_cpu_info()
+                        pbar.set_postfix({
+                            'total_papers': total_processed,
+                            'current_file': Path(result['file']).name,
+                            'cpu%': f"{current_cpu['avg_cpu_usage']:.1f}",
+                            'mem': current_cpu['available_memory']
+                        })
     
     # Final report
     logger.info(f"\nProcessing Complete:")
@@ -276,5 +326,5 @@ if __name__ == "__main__":
     process_json_directory(
         input_directory,
         output_directory,
-        max_workers=os.cpu_count()
+        max_workers=usable_cpu_count()
     )
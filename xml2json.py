@@ -1,13 +1,12 @@
-import xml.etree.ElementTree as ET
-import json
-from collections import defaultdict
+from lxml import etree
+import orjson
+import contextlib
 import gzip
 import os
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from tqdm import tqdm
 import logging
 import time
-from pathlib import Path
 import psutil
 
 # Set up logging
@@ -15,101 +14,110 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('xml_to_json_step1.log'),
+        logging.FileHandler('xml_to_json_step1.log', delay=True),
         logging.StreamHandler()
     ]
 )
 
+# Input is read in large blocks; the parser itself requests small chunks
+READ_BUFFER_SIZE = 1024 * 1024
+
+# Namespace-stripped tag names, resolved once per distinct tag
+_local_names = {}
+
+def local_name(tag):
+    """Return the tag without its '{namespace}' prefix"""
+    name = _local_names.get(tag)
+    if name is None:
+        name = tag.split('}', 1)[1] if '}' in tag else tag
+        _local_names[tag] = name
+    return name
+
 def elem_to_dict(element):
     """Recursively convert XML element to nested dictionary"""
-    d = defaultdict(list)
-    if element.text and element.text.strip():
-        d['_text'] = element.text.strip()
-    d.update({'@'+k: v for k, v in element.attrib.items()})
+    text = element.text.strip() if element.text else ''
+    d = {'_text': text} if text else {}
+    for k, v in element.attrib.items():
+        d['@'+k] = v
     
     for child in element:
+        # Skip comments and processing instructions
+        if not isinstance(child.tag, str):
+            continue
+        tag = local_name(child.tag)
         child_data = elem_to_dict(child)
-        if child.tag in d:
-            if isinstance(d[child.tag], list):
-                d[child.tag].append(child_data)
+        if tag in d:
+            if isinstance(d[tag], list):
+                d[tag].append(child_data)
             else:
-                d[child.tag] = [d[child.tag], child_data]
+                d[tag] = [d[tag], child_data]
         else:
-            d[child.tag] = child_data
+            d[tag] = child_data
             
-    return dict((k, v if not isinstance(v, defaultdict) else dict(v)) 
-                for k, v in d.items())
+    return d
 
-def decompress_xml(gz_file_path, xml_file_path):
-    """Decompress .xml.gz file to .xml"""
-    try:
-        with gzip.open(gz_file_path, 'rb') as gz_file:
-            xml_content = gz_file.read()
-        with open(xml_file_path, 'wb') as xml_file:
-            xml_file.write(xml_content)
-    except Exception as e:
-        logging.error(f"Error decompressing {gz_file_path}: {str(e)}")
-        raise
+def iter_records(input_file):
+    """Yield each REC of an XML/XML.GZ file as a dictionary"""
+    # Stream REC elements so only one record's subtree is in memory;
+    # .xml.gz input is decompressed on the fly rather than to disk
+    with open(input_file, 'rb', buffering=READ_BUFFER_SIZE) as raw:
+        # Ask the kernel for aggressive readahead on this sequential scan
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(raw.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        source = gzip.GzipFile(fileobj=raw) if input_file.endswith('.gz') else raw
+        for _, rec in etree.iterparse(source, tag='{*}REC', huge_tree=True,
+                                      remove_blank_text=True):
+            yield elem_to_dict(rec)
+            # Free the parsed record and any siblings already processed
+            rec.clear()
+            while rec.getprevious() is not None:
+                del rec.getparent()[0]
 
 def process_single_file(args):
     """Process a single XML file and convert to JSON"""
     input_file, output_dir = args
     start_time = time.time()
-    xml_path = None
+    tmp_file = None
     
     try:
         # Create output directory if it doesn't exist
         os.makedirs(output_dir, exist_ok=True)
         
-        # Handle .xml.gz files
-        if input_file.endswith('.xml.gz'):
-            xml_path = input_file[:-3]  # Remove .gz extension
-            logging.info(f"Decompressing {input_file}")
-            decompress_xml(input_file, xml_path)
-        else:
-            xml_path = input_file
-            
-        if not os.path.exists(xml_path):
-            raise FileNotFoundError(f"XML file not found: {xml_path}")
-        
-        # Prepare output JSON path
-        json_file = os.path.join(
-            output_dir,
-            os.path.basename(xml_path).replace('.xml', '.json')
-        )
-        
-        # Parse XML and convert to JSON
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-        
-        # Remove namespace for easier processing
-        for elem in root.iter():
-            if '}' in elem.tag:
-                elem.tag = elem.tag.split('}', 1)[1]
+        # Prepare output JSON path (sample.xml.gz -> sample.json)
+        xml_name = os.path.basename(input_file)
+        if xml_name.endswith('.gz'):
+            xml_name = xml_name[:-3]
+        json_file = os.path.join(output_dir, xml_name.replace('.xml', '.json'))
         
-        records = []
-        for rec in root.findall('.//REC'):
-            record_data = elem_to_dict(rec)
-            records.append(record_data)
-        
-        # Write JSON output
-        with open(json_file, 'w') as f:
-            json.dump({
-                "records": records,
-                "total_records": len(records),
-                "source": input_file
-            }, f, indent=2)
+        # Write each record as soon as it is parsed so only one is held in
+        # memory; the .tmp file is renamed once the document is complete
+        total_records = 0
+        tmp_file = json_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(b'{"records": [\n')
+            for record in iter_records(input_file):
+                if total_records:
+                    f.write(b',\n')
+                f.write(orjson.dumps(record))
+                total_records += 1
+            f.write(b'\n],\n"total_records": %d,\n"source": %s}\n'
+                    % (total_records, orjson.dumps(input_file)))
+        os.replace(tmp_file, json_file)
         
         processing_time = time.time() - start_time
         return {
             'file': input_file,
-            'records': len(records),
+            'records': total_records,
             'time': processing_time,
             'success': True
         }
             
     except Exception as e:
         logging.error(f"Error processing {input_file}: {str(e)}")
+        # Don't leave a partially written document behind
+        if tmp_file:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_file)
         return {
             'file': input_file,
             'records': 0,
@@ -117,19 +125,21 @@ def process_single_file(args):
             'success': False,
             'error': str(e)
         }
-        
-    finally:
-        # Clean up decompressed XML if it was created from a compressed file
-        if xml_path and input_file.endswith('.xml.gz') and os.path.exists(xml_path):
-            try:
-                os.remove(xml_path)
-                logging.debug(f"Cleaned up temporary file: {xml_path}")
-            except Exception as e:
-                logging.warning(f"Failed to clean up temporary file {xml_path}: {str(e)}")
+
+def process_batch(args):
+    """Process a batch of XML files in one worker task"""
+    input_files, output_dir = args
+    return [process_single_file((f, output_dir)) for f in input_files]
+
+def usable_cpu_count():
+    """Number of CPUs this process may run on (host core count where unknown)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count()
 
 def get_cpu_info():
     """Get CPU usage and core information"""
-    cpu = psutil.cpu_percent(interval=1, percpu=True)
+    cpu = psutil.cpu_percent(interval=None, percpu=True)
     return {
         'total_cores': psutil.cpu_count(),
         'physical_cores': psutil.cpu_count(logical=False),
@@ -138,13 +148,29 @@ def get_cpu_info():
         'available_memory': f"{psutil.virtual_memory().available / (1024 * 1024 * 1024):.2f}GB"
     }
 
+# Non-blocking readings are relative to the previous call; take a baseline
+psutil.cpu_percent(interval=None, percpu=True)
+
+def walk_files(root, suffixes):
+    """Recursively yield paths of files under root ending in one of suffixes"""
+    # An empty root means the current directory, as with Path('').rglob();
+    # a missing or unreadable root raises so a mistyped input is reported
+    with os.scandir(root or '.') as entries:
+        for entry in entries:
+            path = os.path.join(root, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                # Unreadable subdirectories are skipped, as rglob() does
+                try:
+                    yield from walk_files(path, suffixes)
+                except OSError:
+                    continue
+            elif entry.name.endswith(suffixes):
+                yield path
+
 def convert_xml_files(input_dir, output_dir, max_workers=None):
     """Convert all XML files in input directory and its subdirectories"""
     # Find all XML and XML.GZ files
-    xml_files = []
-    for ext in ['*.xml', '*.xml.gz']:
-        xml_files.extend(Path(input_dir).rglob(ext))
-    xml_files = [str(f) for f in xml_files]
+    xml_files = list(walk_files(input_dir, ('.xml', '.xml.gz')))
     
     if not xml_files:
         logging.error(f"No XML files found in {input_dir}")
@@ -166,32 +192,47 @@ def convert_xml_files(input_dir, output_dir, max_workers=None):
     successful_files = 0
     failed_files = 0
     
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        # Create arguments list for each file
-        args_list = [(f, output_dir) for f in xml_files]
+    # Size the pool from the CPUs this process may run on (cpu_count()
+    # reports host cores)
+    workers = max_workers or usable_cpu_count()
+    
+    # Start the largest files first so they don't straggle at the end
+    xml_files.sort(key=os.path.getsize, reverse=True)
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Deal files round-robin into ~4 batches per worker so each task
+        # carries several files and every batch gets a similar size mix
+        n_batches = min(len(xml_files), workers * 4)
+        args_list = [(xml_files[i::n_batches], output_dir) for i in range(n_batches)]
         
-        # Process files with progress bar
+        # Process batches with progress bar
         results = []
+        last_refresh = 0.0
         with tqdm(total=len(xml_files), desc="Converting files") as pbar:
-            for result in executor.map(process_single_file, args_list):
-                pbar.update(1)
-                results.append(result)
+            futures = [executor.submit(process_batch, args) for args in args_list]
+            for future in as_completed(futures):
+                batch_results = future.result()
+                pbar.update(len(batch_results))
+                results.extend(batch_results)
+                
+                for result in batch_results:
+                    if result['success']:
+                        successful_files += 1
+                        total_records += result['records']
+                    else:
+                        failed_files += 1
                 
-                # Update progress bar description with current file info
-                if result['success']:
-                    successful_files += 1
-                    total_records += result['records']
-                    # Get current CPU info
+                # Refresh the resource readout at most every 2 seconds
+                if time.time() - last_refresh > 2:
+                    last_refresh = time.time()
                     current_cpu = get_cpu_info()
                     pbar.set_postfix({
                         'records': total_records,
-                        'current_file': os.path.basename(result['file']),
-                        'time': f"{result['time']:.2f}s",
+                        'current_file': os.path.basename(batch_results[-1]['file']),
+                        'time': f"{batch_results[-1]['time']:.2f}s",
                         'avg_cpu': f"{current_cpu['avg_cpu_usage']:.1f}%",
                         'mem_free': current_cpu['available_memory']
                     })
-                else:
-                    failed_files += 1
     
     # Log final statistics
     logging.info(f"\nConversion completed:")
@@ -221,5 +262,5 @@ if __name__ == '__main__':
     convert_xml_files(
         input_directory,
         output_directory,
-        max_workers=os.cpu_count()  # Use all available CPU cores
+        max_workers=usable_cpu_count()  # Use all CPU cores available to this process
     )
\ No newline at end of file